@@ -13,6 +13,9 @@ def load_config(config_path: str) -> Dict[str, Any]:
     with open(config_path, 'rb') as f:
         return tomllib.load(f)
 
+def template_config_key(template_name: str) -> str:
+    return template_name.strip()
+
 def process_node_list(nodes: List[Dict[str, Any]], config: Dict[str, Any]) -> List[IRNode]:
     ir_nodes = []
     for node in nodes:
@@ -27,7 +30,7 @@ def process_node_list(nodes: List[Dict[str, Any]], config: Dict[str, Any]) -> Li
     return ir_nodes
 
 def create_component_node(template_node: Dict[str, Any], config: Dict[str, Any]) -> ComponentNode:
-    template_name = template_node.get('name', '').strip()
+    template_name = template_config_key(template_node.get('name', ''))
     template_config = config.get(template_name)
 
     if not template_config:
@@ -83,13 +86,17 @@ def generate_ir_tree(sectioned_nodes: List[Dict[str, Any]], config: Dict[str, An
             current_parent_list.append(ir_node)
 
         elif node_type == 'section':
+            section_props = {
+                "title": node.get("plain_title", node.get("title", "")),
+                "level": node.get("level", 2)
+            }
+            if node.get("anchor"):
+                section_props["anchor"] = node["anchor"]
+
             section_ir_node = {
                 "type": "component",
                 "component_name": "Section",
-                "props": {
-                    "title": node.get("title", ""),
-                    "level": node.get("level", 2)
-                },
+                "props": section_props,
                 "slots": {
                     "default": generate_ir_tree(node.get("content", []), config)
                 }
@@ -97,7 +104,7 @@ def generate_ir_tree(sectioned_nodes: List[Dict[str, Any]], config: Dict[str, An
             current_parent_list.append(section_ir_node)
         
         elif node_type == 'template':
-            template_name = node.get('name', '').strip()
+            template_name = template_config_key(node.get('name', ''))
             template_config = config.get(template_name, {})
             
             template_type = template_config.get('type')
@@ -136,10 +143,13 @@ def main():
 
 
     content_nodes = sectioned_data.get("content", [])
-    ir_tree = generate_ir_tree(content_nodes, config)
+    ir_document = {
+        "toc": sectioned_data.get("toc", []),
+        "content": generate_ir_tree(content_nodes, config)
+    }
 
     with open(ir_output_path, 'w', encoding='utf-8') as f:
-        json.dump(ir_tree, f, indent=2, ensure_ascii=False)
+        json.dump(ir_document, f, indent=2, ensure_ascii=False)
 
     print(f"Successfully generated IR at {ir_output_path}")
 
@@ -84,7 +84,13 @@ def main():
 
 
     with open(ir_input_path, 'r', encoding='utf-8') as f:
-        ir_tree = json.load(f)
+        ir_document = json.load(f)
+
+    # Older IR files are a bare node list without a precomputed toc
+    if isinstance(ir_document, list):
+        ir_document = {"toc": [], "content": ir_document}
+    ir_tree = ir_document.get("content", [])
+    toc = ir_document.get("toc", [])
         
     components_used = set()
     mdx_content_parts = [generate_mdx_from_node(node, components_used, is_child_of_component=False) for node in ir_tree]
@@ -97,6 +103,7 @@ def main():
     frontmatter = f"""---
 layout: '@/layouts/Layout.astro'
 title: '{page_title}'
+toc: {json.dumps(toc, ensure_ascii=False)}
 ---
 """
 
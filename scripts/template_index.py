@@ -0,0 +1,218 @@
+import json
+import sys
+import os
+import argparse
+import tempfile
+from collections import Counter
+from typing import Dict, Any, List, Tuple
+
+import mwparserfromhell
+
+# Share config loading and lookup keys with the IR generator so "mapped" means the same thing
+from generate_ir import load_config, template_config_key
+
+
+INDEX_VERSION = 2
+
+# Escape templates such as {{=}} and {{!}}; nothing to map in config.toml
+MAGIC_TEMPLATES = {"=", "!"}
+
+# page -> {"mtime_ns": int, "size": int, "templates": {template_name: count}}
+PageEntry = Dict[str, Any]
+# template_name -> {page: count}
+InvertedIndex = Dict[str, Dict[str, int]]
+
+
+def is_magic_template(name: str) -> bool:
+    # Parser functions ({{#if:...}}) and escape templates are not real templates
+    return name in MAGIC_TEMPLATES or name.startswith('#')
+
+def count_templates(content: str) -> Dict[str, int]:
+    counts: Counter = Counter()
+    wikicode = mwparserfromhell.parse(content)
+    for template in wikicode.filter_templates(recursive=True):
+        name = template_config_key(str(template.name))
+        if name and not is_magic_template(name):
+            counts[name] += 1
+    return dict(counts)
+
+def page_name_for(wiki_path: str, wikis_dir: str) -> str:
+    relative_path = os.path.relpath(wiki_path, wikis_dir)
+    return os.path.splitext(relative_path)[0].replace(os.sep, '/')
+
+def iter_wiki_files(wikis_dir: str):
+    for root, _, files in os.walk(wikis_dir):
+        for filename in files:
+            if filename.endswith('.wiki'):
+                yield os.path.join(root, filename)
+
+def empty_index() -> Dict[str, Any]:
+    return {"version": INDEX_VERSION, "pages": {}, "templates": {}}
+
+def load_index(index_path: str) -> Dict[str, Any]:
+    if not os.path.exists(index_path):
+        return empty_index()
+
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except json.JSONDecodeError:
+        print(f"Warning: Index at {index_path} is corrupted, rebuilding it.", file=sys.stderr)
+        return empty_index()
+
+    if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+        print(f"Warning: Index at {index_path} has an unknown version, rebuilding it.", file=sys.stderr)
+        return empty_index()
+    return index
+
+def save_index(index: Dict[str, Any], index_path: str) -> None:
+    # Write to a temp file and swap it in so an interrupted write never truncates the index
+    index_dir = os.path.dirname(os.path.abspath(index_path))
+    fd, tmp_path = tempfile.mkstemp(dir=index_dir, prefix=".template_index.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp_path, index_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def _remove_page(inverted: InvertedIndex, page: str, templates: Dict[str, int]) -> None:
+    for name in templates:
+        pages = inverted.get(name)
+        if pages is None:
+            continue
+        pages.pop(page, None)
+        if not pages:
+            del inverted[name]
+
+def _add_page(inverted: InvertedIndex, page: str, templates: Dict[str, int]) -> None:
+    for name, count in templates.items():
+        inverted.setdefault(name, {})[page] = count
+
+def update_index(index: Dict[str, Any], wikis_dir: str) -> Tuple[int, int, int]:
+    """Re-scan only pages whose mtime or size changed; returns (added, changed, removed)."""
+    pages: Dict[str, PageEntry] = index["pages"]
+    inverted: InvertedIndex = index["templates"]
+    added = changed = 0
+    seen = set()
+
+    for wiki_path in iter_wiki_files(wikis_dir):
+        page = page_name_for(wiki_path, wikis_dir)
+        seen.add(page)
+        stat = os.stat(wiki_path)
+        entry = pages.get(page)
+
+        if entry is not None and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            continue
+
+        with open(wiki_path, 'r', encoding='utf-8') as f:
+            templates = count_templates(f.read())
+
+        if entry is None:
+            added += 1
+        else:
+            changed += 1
+            _remove_page(inverted, page, entry["templates"])
+
+        _add_page(inverted, page, templates)
+        pages[page] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "templates": templates
+        }
+
+    removed_pages = [page for page in pages if page not in seen]
+    for page in removed_pages:
+        _remove_page(inverted, page, pages.pop(page)["templates"])
+
+    return added, changed, len(removed_pages)
+
+def query_template(index: Dict[str, Any], template_name: str) -> List[Tuple[str, int]]:
+    pages = index["templates"].get(template_config_key(template_name), {})
+    return sorted(pages.items(), key=lambda item: (-item[1], item[0]))
+
+def coverage_report(index: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    total_occurrences = 0
+    mapped_occurrences = 0
+    unmapped = []
+
+    for name, pages in index["templates"].items():
+        occurrences = sum(pages.values())
+        total_occurrences += occurrences
+        if name in config:
+            mapped_occurrences += occurrences
+        else:
+            unmapped.append({
+                "name": name,
+                "pages": len(pages),
+                "occurrences": occurrences
+            })
+
+    # Rank by how many pages would render raw text, then by raw occurrences
+    unmapped.sort(key=lambda item: (-item["pages"], -item["occurrences"], item["name"]))
+
+    return {
+        "total_pages": len(index["pages"]),
+        "total_occurrences": total_occurrences,
+        "mapped_occurrences": mapped_occurrences,
+        "coverage": mapped_occurrences / total_occurrences if total_occurrences else 1.0,
+        "unmapped": unmapped
+    }
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Maintain a template name -> pages index over the wiki corpus."
+    )
+    parser.add_argument("--wikis", default="wikis", help="Directory containing the .wiki files. Defaults to ./wikis.")
+    parser.add_argument("--index", default="template_index.json", help="Path of the persistent index file.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("update", help="Incrementally update the index from changed pages (query and report also do this).")
+
+    query_parser = subparsers.add_parser("query", help="List pages that use a template.")
+    query_parser.add_argument("template", help="Template name, e.g. 'dsc inc'.")
+
+    report_parser = subparsers.add_parser("report", help="Rank unmapped templates by corpus impact.")
+    report_parser.add_argument("--config", default="config.toml", help="Path to config.toml.")
+    report_parser.add_argument("-n", "--top", type=int, default=30, help="Number of unmapped templates to show.")
+    report_parser.add_argument("--json", action="store_true", help="Print the full report as JSON.")
+
+    args = parser.parse_args()
+
+    index = load_index(args.index)
+
+    # Always refresh first; unchanged pages are skipped, so queries never answer from stale data
+    if not os.path.isdir(args.wikis):
+        print(f"Error: Wiki directory not found at {args.wikis}", file=sys.stderr)
+        sys.exit(1)
+    added, changed, removed = update_index(index, args.wikis)
+    if added or changed or removed:
+        save_index(index, args.index)
+    if args.command == "update" or added or changed or removed:
+        print(f"Index updated: {added} added, {changed} changed, {removed} removed ({len(index['pages'])} pages).", file=sys.stderr)
+
+    if args.command == "query":
+        results = query_template(index, args.template)
+        for page, count in results:
+            print(f"{count:6d}  {page}")
+        total = sum(count for _, count in results)
+        print(f"'{template_config_key(args.template)}': {total} occurrences on {len(results)} pages", file=sys.stderr)
+
+    elif args.command == "report":
+        report = coverage_report(index, load_config(args.config))
+        if args.json:
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+            return
+
+        print(f"Pages: {report['total_pages']}")
+        print(f"Template occurrences: {report['total_occurrences']} "
+              f"({report['mapped_occurrences']} mapped, {report['coverage']:.1%} coverage)")
+        print(f"Unmapped templates: {len(report['unmapped'])}")
+        print()
+        print(f"{'pages':>6}  {'uses':>7}  template")
+        for item in report["unmapped"][:args.top]:
+            print(f"{item['pages']:6d}  {item['occurrences']:7d}  {item['name']}")
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,6 @@
 import mwparserfromhell
 import json
-from typing import Dict, List, Any, Union
+from typing import Dict, List, Any, Set, Union
 import logging
 import argparse
 import os
@@ -245,14 +245,81 @@ class ImprovedWikiTextParser:
             logger.warning(f"解析章节标题时出错: {str(e)}")
             return None
     
+    def _plain_heading_text(self, wikicode, strip_decoded_tags: bool = True) -> str:
+        """
+        将章节标题的 wikitext 转换为纯文本
+
+        模板保留第一个位置参数的内容（如 {{lc|std::fprintf}} -> std::fprintf），
+        没有位置参数的模板（如 {{mark since c++17}}）被丢弃；链接保留显示文本。
+        HTML 实体解码后得到的标签（如 &lt;blockquote&gt;）会再去除一次。
+
+        Args:
+            wikicode: mwparserfromhell 解析结果
+            strip_decoded_tags: 是否对解码后的文本再做一次标签去除（仅顶层调用）
+
+        Returns:
+            纯文本标题
+        """
+        parts = []
+        for node in wikicode.nodes:
+            if isinstance(node, mwparserfromhell.nodes.Template):
+                if node.has("1"):
+                    parts.append(self._plain_heading_text(node.get("1").value, False))
+            elif isinstance(node, mwparserfromhell.nodes.Wikilink):
+                parts.append(self._plain_heading_text(node.text if node.text is not None else node.title, False))
+            elif isinstance(node, mwparserfromhell.nodes.Tag):
+                if node.contents is not None:
+                    parts.append(self._plain_heading_text(node.contents, False))
+            elif isinstance(node, mwparserfromhell.nodes.Text):
+                # 直接取文本，避免 ; : * # 被重新解析为列表标记
+                parts.append(node.value)
+            elif isinstance(node, (mwparserfromhell.nodes.Comment, mwparserfromhell.nodes.Heading)):
+                continue
+            else:
+                parts.append(mwparserfromhell.parse(str(node)).strip_code(normalize=True, collapse=True))
+
+        text = "".join(parts)
+        if strip_decoded_tags and "<" in text:
+            text = self._plain_heading_text(mwparserfromhell.parse(text), False)
+        return " ".join(text.split())
+
+    def _make_anchor(self, plain_title: str, used_anchors: Set[str]) -> str:
+        """
+        为章节标题生成与 MediaWiki 兼容的锚点
+
+        保留大小写，空白替换为 _，与源文中 [[#Format string]]、
+        [[page#Notes]] 等链接一致。重复的锚点按出现顺序追加 _2、_3 等后缀，
+        直到得到页面内唯一的锚点。
+
+        Args:
+            plain_title: 纯文本章节标题
+            used_anchors: 当前页面已生成的全部锚点
+
+        Returns:
+            锚点
+        """
+        anchor = "_".join(plain_title.split()) or "section"
+
+        candidate = anchor
+        n = 1
+        while candidate in used_anchors:
+            n += 1
+            candidate = f"{anchor}_{n}"
+        used_anchors.add(candidate)
+        return candidate
+
     def parse_with_sections(self, content: str, source_file: str = "") -> Dict[str, Any]:
         """
         解析内容并按章节组织
-        
+
+        使用层级栈在一次遍历中构建嵌套的章节树：较深的标题成为上一个
+        较浅标题的子章节，同级或更浅的标题关闭之前打开的章节。同时生成
+        带锚点的目录（toc），供渲染层直接使用。
+
         Args:
             content: wikitext 内容
             source_file: 源文件路径
-            
+
         Returns:
             按章节组织的解析结果
         """
@@ -263,36 +330,53 @@ class ImprovedWikiTextParser:
             if "error" in sequential_result:
                 return sequential_result
             
-            # 重新组织为章节结构
+            # 重新组织为嵌套章节结构
             organized_content = []
-            current_section = None
+            toc = []
+            used_anchors: Set[str] = set()
+            self.section_stack = []
             
             for item in sequential_result["content"]:
                 if item["type"] == "section":
-                    # 保存当前章节
-                    if current_section is not None:
-                        organized_content.append(current_section)
+                    # 关闭所有同级或更深的章节
+                    while self.section_stack and self.section_stack[-1]["level"] >= item["level"]:
+                        self.section_stack.pop()
                     
-                    # 开始新章节
-                    current_section = {
+                    plain_title = self._plain_heading_text(mwparserfromhell.parse(item["title"])) or item["title"]
+                    anchor = self._make_anchor(plain_title, used_anchors)
+                    section = {
                         "type": "section",
                         "level": item["level"],
                         "title": item["title"],
+                        "plain_title": plain_title,
+                        "anchor": anchor,
                         "content": []
                     }
+                    toc.append({
+                        "level": item["level"],
+                        "depth": len(self.section_stack),
+                        "title": plain_title,
+                        "anchor": anchor
+                    })
+                    
+                    # 挂到父章节或顶级内容
+                    if self.section_stack:
+                        self.section_stack[-1]["content"].append(section)
+                    else:
+                        organized_content.append(section)
+                    self.section_stack.append(section)
                 else:
                     # 添加到当前章节或顶级内容
-                    if current_section is not None:
-                        current_section["content"].append(item)
+                    if self.section_stack:
+                        self.section_stack[-1]["content"].append(item)
                     else:
                         organized_content.append(item)
             
-            # 添加最后一个章节
-            if current_section is not None:
-                organized_content.append(current_section)
+            self.section_stack = []
             
             return {
                 "source_file": source_file,
+                "toc": toc,
                 "content": organized_content
             }
             